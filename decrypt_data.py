@@ -6,73 +6,199 @@ Uses SecureDataHandler class with AES-CBC encryption and HMAC-SHA256.
 
 import os
 import sys
-import json
 import base64
-import urllib.request
 import time
 import logging
-from datetime import datetime
-from utils.secure_data_handler import SecureDataHandler
+import orjson
+import urllib3
+from urllib3.exceptions import HTTPError as NetworkError
+from utils.secure_data_handler import SecureDataHandler, OPENSSL_VERSION
 
-# Configure logging
+# Configure logging to stderr. No timestamps: the Netlify/CI log already
+# stamps each line, and skipping asctime saves a strftime per record.
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+    format='%(levelname)s - %(message)s',
+    stream=sys.stderr
 )
 logger = logging.getLogger(__name__)
 
-def json_serializer(obj):
-    """Handle datetime serialization."""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+# SecureDataHandler instances keyed by (encryption_key, hmac_key)
+_HANDLER_CACHE = {}
 
-def fetch_with_retry(url, max_retries=3, initial_delay=1):
+# Shared connection pool so retries reuse the open TLS connection. urllib3 is
+# told not to retry by itself (only redirects are followed) so that the
+# backoff logic in fetch_with_retry stays in charge.
+HTTP_POOL = urllib3.PoolManager(
+    maxsize=4,
+    retries=urllib3.Retry(total=None, connect=0, read=0, other=0, redirect=5)
+)
+HTTP_TIMEOUT = urllib3.Timeout(connect=5, read=30)
+# Ask for a compressed body; urllib3 decompresses it while reading
+HTTP_HEADERS = urllib3.make_headers(accept_encoding=True)
+
+# ETag / Last-Modified of the response the output file was written from.
+# Kept outside static/ so Hugo does not publish it.
+VALIDATORS_PATH = os.path.join('.cache', 'energy_price_forecast.validators.json')
+
+class HTTPStatusError(Exception):
+    """Raised when the server answers with an HTTP error status."""
+
+    def __init__(self, code, reason):
+        super().__init__(f"HTTP {code} error: {reason}")
+        self.code = code
+        self.reason = reason
+
+class NotModified(Exception):
+    """Raised when a conditional request is answered with HTTP 304."""
+
+def get_handler(encryption_key, hmac_key):
     """
-    Fetch URL with exponential backoff retry logic.
+    Return a SecureDataHandler for the given keys, reusing one created earlier
+    in this process so the key setup is only done once.
+
+    Args:
+        encryption_key (bytes): Decoded AES-256 key
+        hmac_key (bytes): Decoded HMAC-SHA256 key
+
+    Returns:
+        SecureDataHandler: Handler for the key pair
+    """
+    cache_key = (encryption_key, hmac_key)
+    handler = _HANDLER_CACHE.get(cache_key)
+    if handler is None:
+        handler = SecureDataHandler(encryption_key, hmac_key)
+        _HANDLER_CACHE[cache_key] = handler
+    return handler
+
+def request_with_retry(url, max_retries=3, initial_delay=1, max_elapsed=30, headers=None):
+    """
+    GET a URL with exponential backoff retry logic and return the response.
 
     Args:
         url (str): URL to fetch
         max_retries (int): Maximum number of retry attempts
         initial_delay (int): Initial delay in seconds (doubles with each retry)
+        max_elapsed (float): Time budget in seconds after which no further
+            retries are started
+        headers (dict): Extra request headers, e.g. If-Modified-Since
 
     Returns:
-        str: Response data
+        urllib3.BaseHTTPResponse: Successful response, body already read
+            into .data and headers (ETag, Last-Modified) in .headers
 
     Raises:
+        NotModified: If a conditional request got HTTP 304
         Exception: If all retry attempts fail
     """
+    request_headers = {**HTTP_HEADERS, **headers} if headers else HTTP_HEADERS
     delay = initial_delay
     last_error = None
+    attempts = 0
+    deadline = time.monotonic() + max_elapsed
 
     for attempt in range(max_retries):
+        attempts += 1
         try:
-            logger.info(f"Attempt {attempt + 1}/{max_retries}: Fetching {url}")
-            with urllib.request.urlopen(url, timeout=30) as response:
-                data = response.read().decode()
-                logger.info(f"Successfully fetched {len(data)} characters from {url}")
-                return data
-        except urllib.error.HTTPError as e:
-            last_error = e
-            logger.error(f"HTTP {e.code} error: {e.reason}")
-            if e.code in [404, 403, 401]:  # Don't retry on client errors
-                raise
-        except urllib.error.URLError as e:
-            last_error = e
-            logger.error(f"Network error: {e.reason}")
+            logger.info("Attempt %d/%d: Fetching %s", attempt + 1, max_retries, url)
+            response = HTTP_POOL.request('GET', url, headers=request_headers, timeout=HTTP_TIMEOUT)
+            if response.status == 304:
+                raise NotModified(url)
+            if response.status >= 400:
+                raise HTTPStatusError(response.status, response.reason)
+            logger.info("Successfully fetched %d bytes from %s", len(response.data), url)
+            return response
         except Exception as e:
+            if isinstance(e, NotModified):
+                raise
             last_error = e
-            logger.error(f"Unexpected error: {e}")
+            if isinstance(e, HTTPStatusError):
+                logger.error("HTTP %s error: %s", e.code, e.reason)
+                if e.code in (404, 403, 401):  # Don't retry on client errors
+                    raise
+            elif isinstance(e, NetworkError):
+                logger.error("Network error: %s", getattr(e, 'reason', e))
+            else:
+                logger.error("Unexpected error: %s", e)
 
-        # If not the last attempt, wait before retrying
+        # If not the last attempt, wait before retrying (within the time budget)
         if attempt < max_retries - 1:
-            logger.info(f"Waiting {delay}s before retry...")
-            time.sleep(delay)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Retry time budget of %ss exhausted", max_elapsed)
+                break
+            wait = min(delay, remaining)
+            logger.info("Waiting %.1fs before retry...", wait)
+            time.sleep(wait)
             delay *= 2  # Exponential backoff
 
     # All retries failed
-    raise Exception(f"Failed to fetch {url} after {max_retries} attempts. Last error: {last_error}")
+    raise Exception(f"Failed to fetch {url} after {attempts} attempts. Last error: {last_error}")
+
+def fetch_with_retry(url, max_retries=3, initial_delay=1, max_elapsed=30, headers=None):
+    """
+    Fetch URL with exponential backoff retry logic.
+
+    Args:
+        url (str): URL to fetch
+        max_retries (int): Maximum number of retry attempts
+        initial_delay (int): Initial delay in seconds (doubles with each retry)
+        max_elapsed (float): Time budget in seconds after which no further
+            retries are started
+        headers (dict): Extra request headers, e.g. If-Modified-Since
+
+    Returns:
+        bytes: Response body
+
+    Raises:
+        NotModified: If a conditional request got HTTP 304
+        Exception: If all retry attempts fail
+    """
+    return request_with_retry(url, max_retries, initial_delay, max_elapsed, headers).data
+
+def conditional_headers(validators):
+    """
+    Build conditional request headers from the validators the server sent
+    with the last successful response.
+
+    Args:
+        validators (dict): May hold 'etag' and 'last_modified' (the server's
+            ETag and Last-Modified header values)
+
+    Returns:
+        dict: If-None-Match / If-Modified-Since headers, or None if there
+            are no validators
+    """
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers or None
+
+def write_file_atomic(path, data):
+    """
+    Write bytes to a file via a temporary file and a rename, so readers never
+    see a truncated or half-written file.
+
+    Args:
+        path (str): Destination path
+        data (bytes): File contents
+
+    Raises:
+        OSError: If writing or renaming fails (the temporary file is removed)
+    """
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
 def validate_base64_key(key_b64, key_name, expected_length=32):
     """
@@ -92,13 +218,10 @@ def validate_base64_key(key_b64, key_name, expected_length=32):
     if not key_b64:
         raise ValueError(f"{key_name} is not set")
 
-    # Check if it looks like base64
-    if not key_b64.replace('=', '').replace('+', '').replace('/', '').isalnum():
-        raise ValueError(f"{key_name} does not appear to be valid base64 (contains invalid characters)")
-
+    # validate=True rejects any character outside the base64 alphabet
     try:
-        decoded_key = base64.b64decode(key_b64)
-    except Exception as e:
+        decoded_key = base64.b64decode(key_b64, validate=True)
+    except ValueError as e:
         raise ValueError(f"{key_name} is not valid base64: {e}")
 
     if len(decoded_key) != expected_length:
@@ -112,59 +235,87 @@ def validate_base64_key(key_b64, key_name, expected_length=32):
 def fetch_and_decrypt_energy_data():
     """Fetch and decrypt energy price forecast data."""
     try:
+        url = 'https://raw.githubusercontent.com/ducroq/energydatahub/main/docs/energy_price_forecast.json'
+        output_path = 'static/data/energy_price_forecast.json'
+
         # Get base64-encoded keys from environment variables
         encryption_key_b64 = os.environ.get('ENCRYPTION_KEY_B64')
         hmac_key_b64 = os.environ.get('HMAC_KEY_B64')
 
         logger.info("Validating environment variables...")
 
-        # Validate and decode the keys
+        # Validate and decode the keys before touching the network, so a
+        # misconfigured build fails without waiting on a download
         try:
             encryption_key = validate_base64_key(encryption_key_b64, 'ENCRYPTION_KEY_B64', expected_length=32)
             hmac_key = validate_base64_key(hmac_key_b64, 'HMAC_KEY_B64', expected_length=32)
-            logger.info(f"Encryption key validated: {len(encryption_key)} bytes (256-bit)")
-            logger.info(f"HMAC key validated: {len(hmac_key)} bytes (256-bit)")
+            logger.info("Encryption key validated: %d bytes (256-bit)", len(encryption_key))
+            logger.info("HMAC key validated: %d bytes (256-bit)", len(hmac_key))
         except ValueError as e:
-            logger.error(f"Environment variable validation failed: {e}")
+            logger.error("Environment variable validation failed: %s", e)
             return False
-        
+
+        # If we already have decrypted data, only download when the remote
+        # file changed since the response it was written from. The server's
+        # own validators are used, not the local mtime, which a copy or cache
+        # restore can move past a newer remote version.
+        headers = None
+        if os.path.exists(output_path):
+            try:
+                with open(VALIDATORS_PATH, 'rb') as f:
+                    headers = conditional_headers(orjson.loads(f.read()))
+            except (OSError, orjson.JSONDecodeError):
+                pass
+
         # Initialize your SecureDataHandler with the decoded keys
-        handler = SecureDataHandler(encryption_key, hmac_key)
-        
-        # Fetch encrypted data from GitHub Pages endpoint with retry logic
-        url = 'https://raw.githubusercontent.com/ducroq/energydatahub/main/docs/energy_price_forecast.json'
-        logger.info(f"Fetching energy data from {url}")
+        logger.info("Crypto backend: %s", OPENSSL_VERSION)
+        handler = get_handler(encryption_key, hmac_key)
 
-        encrypted_data = fetch_with_retry(url, max_retries=3, initial_delay=2)
+        # Fetch encrypted data from GitHub Pages (raises if all retry attempts failed)
+        logger.info("Fetching energy data from %s", url)
+        try:
+            response = request_with_retry(url, max_retries=3, initial_delay=2, headers=headers)
+        except NotModified:
+            logger.info("Remote data not modified, keeping %s", output_path)
+            return True
 
         # Decrypt using your handler (same method as your example)
         logger.info("Decrypting data...")
-        decrypted = handler.decrypt_and_verify(encrypted_data)
+        decrypted = handler.decrypt_and_verify(response.data)
         
-        # Ensure data directory exists
-        os.makedirs('static/data', exist_ok=True)
-        output_path = 'static/data/energy_price_forecast.json'
+        # Ensure data directory exists (a single stat on every build after the first)
+        if not os.path.isdir('static/data'):
+            os.makedirs('static/data', exist_ok=True)
         
-        # Save decrypted data with datetime serialization
-        with open(output_path, 'w') as f:
-            json.dump(decrypted, f, indent=2, default=json_serializer)
+        # Serialize to compact JSON bytes (only read by the frontend; orjson
+        # handles datetimes natively) and save them atomically
+        write_file_atomic(output_path, orjson.dumps(decrypted))
+
+        # Remember the validators for the next conditional request (written
+        # after the data, so a failure in between only costs a full download)
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        os.makedirs(os.path.dirname(VALIDATORS_PATH), exist_ok=True)
+        write_file_atomic(VALIDATORS_PATH, orjson.dumps(validators))
 
-        logger.info(f"Successfully decrypted and saved energy data to {output_path}")
+        logger.info("Successfully decrypted and saved energy data to %s", output_path)
 
         # Log some info about the data
         if isinstance(decrypted, list):
-            logger.info(f"Data contains {len(decrypted)} records")
+            logger.info("Data contains %d records", len(decrypted))
             if len(decrypted) > 0:
-                logger.debug(f"First record: {decrypted[0]}")
+                logger.debug("First record: %s", decrypted[0])
         elif isinstance(decrypted, dict):
-            logger.info(f"Data is a dict with keys: {list(decrypted.keys())}")
+            logger.info("Data is a dict with keys: %s", list(decrypted.keys()))
         else:
-            logger.info(f"Data type: {type(decrypted)}")
+            logger.info("Data type: %s", type(decrypted))
 
         return True
 
     except Exception as e:
-        logger.error(f"Error decrypting energy data: {e}", exc_info=True)
+        logger.error("Error decrypting energy data: %s", e, exc_info=True)
         return False
 
 def main():
@@ -6,27 +6,26 @@ Uses SecureDataHandler class with AES-CBC encryption and HMAC-SHA256.
 Optimizations:
 - Skips decryption if data is fresh (< 24 hours old)
 - Validates remote data timestamp before fetching
-- Caches decrypted data between builds
+- Caches decrypted data between builds (in the Netlify build cache on Netlify)
 """
 
 import os
 import sys
 import json
-import base64
-import urllib.request
 import time
 import logging
+import shutil
 import hashlib
+import orjson
 from datetime import datetime, timedelta
 from pathlib import Path
-from utils.secure_data_handler import SecureDataHandler
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+from decrypt_data import (
+    get_handler, request_with_retry, validate_base64_key, conditional_headers,
+    write_file_atomic, NotModified
 )
+from utils.secure_data_handler import OPENSSL_VERSION
+
+# Logging is configured by decrypt_data (imported above)
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -37,13 +36,6 @@ CACHE_MAX_AGE_HOURS = 24  # Re-fetch if data is older than this
 METADATA_FILE = 'energy_data_metadata.json'
 
 
-def json_serializer(obj):
-    """Handle datetime serialization."""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
-
-
 def get_file_age_hours(filepath):
     """
     Get the age of a file in hours.
@@ -54,28 +46,26 @@ def get_file_age_hours(filepath):
     Returns:
         float: Age in hours, or None if file doesn't exist
     """
-    if not os.path.exists(filepath):
+    try:
+        file_mtime = os.stat(filepath).st_mtime
+    except FileNotFoundError:
         return None
 
-    file_mtime = os.path.getmtime(filepath)
-    current_time = time.time()
-    age_seconds = current_time - file_mtime
-    age_hours = age_seconds / 3600
-
-    return age_hours
+    age_seconds = time.time() - file_mtime
+    return age_seconds / 3600
 
 
-def calculate_data_hash(data_str):
+def calculate_data_hash(data_bytes):
     """
-    Calculate SHA256 hash of data string.
+    Calculate SHA256 hash of fetched data.
 
     Args:
-        data_str (str): Data to hash
+        data_bytes (bytes): Raw response body to hash
 
     Returns:
         str: Hex digest of SHA256 hash
     """
-    return hashlib.sha256(data_str.encode()).hexdigest()
+    return hashlib.sha256(data_bytes).hexdigest()
 
 
 def load_metadata(metadata_path):
@@ -95,7 +85,7 @@ def load_metadata(metadata_path):
         with open(metadata_path, 'r') as f:
             return json.load(f)
     except Exception as e:
-        logger.warning(f"Failed to load metadata: {e}")
+        logger.warning("Failed to load metadata: %s", e)
         return {}
 
 
@@ -108,154 +98,152 @@ def save_metadata(metadata_path, metadata):
         metadata (dict): Metadata to save
     """
     try:
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2, default=json_serializer)
-        logger.info(f"Saved metadata to {metadata_path}")
+        # Timestamps are stored as ISO 8601 strings, so this is plain JSON
+        write_file_atomic(metadata_path, orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+        logger.info("Saved metadata to %s", metadata_path)
     except Exception as e:
-        logger.warning(f"Failed to save metadata: {e}")
+        logger.warning("Failed to save metadata: %s", e)
 
 
-def fetch_with_retry(url, max_retries=3, initial_delay=1):
+def should_skip_decryption(output_path, metadata):
     """
-    Fetch URL with exponential backoff retry logic.
+    Determine if decryption can be skipped based on cached data age.
 
     Args:
-        url (str): URL to fetch
-        max_retries (int): Maximum number of retry attempts
-        initial_delay (int): Initial delay in seconds (doubles with each retry)
+        output_path (str): Path to output data file
+        metadata (dict): Already loaded metadata (see load_metadata)
 
     Returns:
-        str: Response data
-
-    Raises:
-        Exception: If all retry attempts fail
+        bool: True if decryption should be skipped, False otherwise
     """
-    delay = initial_delay
-    last_error = None
+    # Check file age (None means the output file does not exist)
+    age_hours = get_file_age_hours(output_path)
+    if age_hours is None:
+        logger.info("Output file does not exist, decryption required")
+        return False
 
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Attempt {attempt + 1}/{max_retries}: Fetching {url}")
-            with urllib.request.urlopen(url, timeout=30) as response:
-                data = response.read().decode()
-                logger.info(f"Successfully fetched {len(data)} characters from {url}")
-                return data
-        except urllib.error.HTTPError as e:
-            last_error = e
-            logger.error(f"HTTP {e.code} error: {e.reason}")
-            if e.code in [404, 403, 401]:  # Don't retry on client errors
-                raise
-        except urllib.error.URLError as e:
-            last_error = e
-            logger.error(f"Network error: {e.reason}")
-        except Exception as e:
-            last_error = e
-            logger.error(f"Unexpected error: {e}")
-
-        # If not the last attempt, wait before retrying
-        if attempt < max_retries - 1:
-            logger.info(f"Waiting {delay}s before retry...")
-            time.sleep(delay)
-            delay *= 2  # Exponential backoff
-
-    # All retries failed
-    raise Exception(f"Failed to fetch {url} after {max_retries} attempts. Last error: {last_error}")
-
-
-def validate_base64_key(key_b64, key_name, expected_length=32):
-    """
-    Validate that a base64-encoded key is properly formatted and has correct length.
+    if age_hours > CACHE_MAX_AGE_HOURS:
+        logger.info("Cached data is %.1f hours old (max: %sh), refresh needed", age_hours, CACHE_MAX_AGE_HOURS)
+        return False
 
-    Args:
-        key_b64 (str): Base64-encoded key
-        key_name (str): Name of the key (for error messages)
-        expected_length (int): Expected length in bytes after decoding (default: 32 for 256-bit)
+    logger.info("Cached data is %.1f hours old (max: %sh)", age_hours, CACHE_MAX_AGE_HOURS)
 
-    Returns:
-        bytes: Decoded key
+    # Log when data was last updated
+    if metadata:
+        last_fetch = metadata.get('last_fetch_time')
+        if last_fetch:
+            logger.info("Last fetch: %s", last_fetch)
 
-    Raises:
-        ValueError: If validation fails
+    logger.info("✓ Using cached data (still fresh)")
+    return True
+
+
+def get_cache_dir():
     """
-    if not key_b64:
-        raise ValueError(f"{key_name} is not set")
+    Get the directory where decrypted data and metadata are kept between runs.
 
-    # Check if it looks like base64
-    if not key_b64.replace('=', '').replace('+', '').replace('/', '').isalnum():
-        raise ValueError(f"{key_name} does not appear to be valid base64 (contains invalid characters)")
+    On Netlify (NETLIFY and NETLIFY_BUILD_BASE are set) the files live in
+    $NETLIFY_BUILD_BASE/cache/energy_data and are copied to OUTPUT_DIR for
+    publishing, so the cached copy no longer depends on whether Netlify
+    restores static/data (see ADR-003 for the stale-data incident that
+    came from such a restore). Netlify does not guarantee that this path
+    survives between builds by itself; to persist it explicitly, list it
+    with netlify-plugin-cache in netlify.toml:
 
-    try:
-        decoded_key = base64.b64decode(key_b64)
-    except Exception as e:
-        raise ValueError(f"{key_name} is not valid base64: {e}")
+        [[plugins]]
+          package = "netlify-plugin-cache"
+          [plugins.inputs]
+            paths = ["/opt/build/cache/energy_data"]
 
-    if len(decoded_key) != expected_length:
-        raise ValueError(
-            f"{key_name} has incorrect length: {len(decoded_key)} bytes "
-            f"(expected {expected_length} bytes for {expected_length * 8}-bit key)"
-        )
+    Netlify builds run with --force (ADR-003), so there the cached copy is
+    only used as a bounded fallback when the fetch fails (see
+    update_cached_data). Elsewhere the cache is OUTPUT_DIR itself.
 
-    return decoded_key
+    Returns:
+        str: Cache directory path
+    """
+    build_base = os.environ.get('NETLIFY_BUILD_BASE')
+    if os.environ.get('NETLIFY') and build_base:
+        return os.path.join(build_base, 'cache', 'energy_data')
+    return OUTPUT_DIR
 
 
-def should_skip_decryption(output_path, metadata_path):
+def copy_file_atomic(src, dst):
     """
-    Determine if decryption can be skipped based on cached data age.
+    Copy a file via a temporary file and a rename, so readers of dst never
+    see a partial copy.
 
     Args:
-        output_path (str): Path to output data file
-        metadata_path (str): Path to metadata file
+        src (str): Source path
+        dst (str): Destination path
 
-    Returns:
-        bool: True if decryption should be skipped, False otherwise
+    Raises:
+        OSError: If copying or renaming fails (the temporary file is removed)
     """
-    # Check if output file exists
-    if not os.path.exists(output_path):
-        logger.info("Output file does not exist, decryption required")
-        return False
+    tmp_path = dst + '.tmp'
+    try:
+        shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
-    # Check file age
-    age_hours = get_file_age_hours(output_path)
-    if age_hours is None:
-        logger.info("Cannot determine file age, decryption required")
-        return False
 
-    if age_hours > CACHE_MAX_AGE_HOURS:
-        logger.info(f"Cached data is {age_hours:.1f} hours old (max: {CACHE_MAX_AGE_HOURS}h), refresh needed")
-        return False
+def publish_cached_data(cache_dir):
+    """
+    Copy the cached data (and metadata, if present) into OUTPUT_DIR for Hugo.
 
-    logger.info(f"Cached data is {age_hours:.1f} hours old (max: {CACHE_MAX_AGE_HOURS}h)")
+    Args:
+        cache_dir (str): Directory holding the cached files
 
-    # Load metadata to check when data was last updated
-    metadata = load_metadata(metadata_path)
-    if metadata:
-        last_fetch = metadata.get('last_fetch_time')
-        if last_fetch:
-            logger.info(f"Last fetch: {last_fetch}")
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        if not os.path.isdir(OUTPUT_DIR):
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    logger.info("✓ Using cached data (still fresh)")
-    return True
+        copy_file_atomic(os.path.join(cache_dir, OUTPUT_FILE), os.path.join(OUTPUT_DIR, OUTPUT_FILE))
+        metadata_path = os.path.join(cache_dir, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            copy_file_atomic(metadata_path, os.path.join(OUTPUT_DIR, METADATA_FILE))
 
+        logger.info("Copied cached data from %s to %s", cache_dir, OUTPUT_DIR)
+        return True
+    except OSError as e:
+        logger.error("Failed to copy cached data to %s: %s", OUTPUT_DIR, e)
+        return False
 
-def fetch_and_decrypt_energy_data(force_refresh=False):
+
+def update_cached_data(cache_dir, force_refresh=False):
     """
-    Fetch and decrypt energy price forecast data with intelligent caching.
+    Fetch and decrypt energy price forecast data into the cache directory,
+    unless the cached copy can be reused.
 
     Args:
+        cache_dir (str): Directory for the decrypted data and metadata
         force_refresh (bool): Force refresh even if cache is valid
 
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        # Ensure output directory exists
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        # Ensure cache directory exists
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
 
-        output_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
-        metadata_path = os.path.join(OUTPUT_DIR, METADATA_FILE)
+        output_path = os.path.join(cache_dir, OUTPUT_FILE)
+        metadata_path = os.path.join(cache_dir, METADATA_FILE)
+
+        # Load metadata once; it is used for the skip check, the
+        # conditional request and the hash comparison
+        metadata = load_metadata(metadata_path)
 
         # Check if we can skip decryption
-        if not force_refresh and should_skip_decryption(output_path, metadata_path):
+        if not force_refresh and should_skip_decryption(output_path, metadata):
             logger.info("Skipping decryption - using cached data")
             return True
 
@@ -269,66 +257,89 @@ def fetch_and_decrypt_energy_data(force_refresh=False):
         try:
             encryption_key = validate_base64_key(encryption_key_b64, 'ENCRYPTION_KEY_B64', expected_length=32)
             hmac_key = validate_base64_key(hmac_key_b64, 'HMAC_KEY_B64', expected_length=32)
-            logger.info(f"Encryption key validated: {len(encryption_key)} bytes (256-bit)")
-            logger.info(f"HMAC key validated: {len(hmac_key)} bytes (256-bit)")
+            logger.info("Encryption key validated: %d bytes (256-bit)", len(encryption_key))
+            logger.info("HMAC key validated: %d bytes (256-bit)", len(hmac_key))
         except ValueError as e:
-            logger.error(f"Environment variable validation failed: {e}")
+            logger.error("Environment variable validation failed: %s", e)
             return False
 
-        # Initialize SecureDataHandler
-        handler = SecureDataHandler(encryption_key, hmac_key)
+        # Get a SecureDataHandler (reused across calls in this process)
+        logger.info("Crypto backend: %s", OPENSSL_VERSION)
+        handler = get_handler(encryption_key, hmac_key)
+
+        # Ask the server to answer 304 if the data is unchanged since the
+        # last fetch (skip this check if force_refresh is True)
+        headers = None
+        if not force_refresh and os.path.exists(output_path):
+            headers = conditional_headers(metadata)
 
         # Fetch encrypted data with retry logic
-        logger.info(f"Fetching energy data from {DATA_SOURCE_URL}")
-        encrypted_data = fetch_with_retry(DATA_SOURCE_URL, max_retries=3, initial_delay=2)
+        logger.info("Fetching energy data from %s", DATA_SOURCE_URL)
+        try:
+            response = request_with_retry(DATA_SOURCE_URL, max_retries=3, initial_delay=2, headers=headers)
+        except NotModified:
+            logger.info("Remote data unchanged (HTTP 304), using existing decrypted data")
+            # Reset the file age so the freshness check counts from now
+            os.utime(output_path)
+            metadata['last_check_time'] = datetime.now().isoformat()
+            save_metadata(metadata_path, metadata)
+            return True
+
+        encrypted_data = response.data
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
 
         # Calculate hash of encrypted data
         data_hash = calculate_data_hash(encrypted_data)
 
         # Check if data has changed (skip this check if force_refresh is True)
-        metadata = load_metadata(metadata_path)
         previous_hash = metadata.get('data_hash')
 
         if not force_refresh and previous_hash == data_hash and os.path.exists(output_path):
             logger.info("Remote data unchanged (hash match), using existing decrypted data")
-            # Update metadata timestamp
-            metadata['last_check_time'] = datetime.now()
+            # Update metadata timestamp and validators
+            metadata['last_check_time'] = datetime.now().isoformat()
+            metadata['etag'] = etag
+            metadata['last_modified'] = last_modified
             save_metadata(metadata_path, metadata)
             return True
 
         if force_refresh:
-            logger.info(f"Force refresh enabled - re-decrypting data (hash: {data_hash[:16]}...)")
+            logger.info("Force refresh enabled - re-decrypting data (hash: %s...)", data_hash[:16])
         elif previous_hash:
-            logger.info(f"Data has changed (hash: {data_hash[:16]}...)")
+            logger.info("Data has changed (hash: %s...)", data_hash[:16])
         else:
-            logger.info(f"First fetch (hash: {data_hash[:16]}...)")
+            logger.info("First fetch (hash: %s...)", data_hash[:16])
 
         # Decrypt the data
         logger.info("Decrypting data...")
         decrypted = handler.decrypt_and_verify(encrypted_data)
 
-        # Save decrypted data
-        with open(output_path, 'w') as f:
-            json.dump(decrypted, f, indent=2, default=json_serializer)
+        # Save decrypted data as compact JSON (only read by the frontend),
+        # atomically so Hugo never picks up a half-written file
+        write_file_atomic(output_path, orjson.dumps(decrypted))
 
-        logger.info(f"Successfully decrypted and saved energy data to {output_path}")
+        logger.info("Successfully decrypted and saved energy data to %s", output_path)
 
         # Log data info
         if isinstance(decrypted, list):
-            logger.info(f"Data contains {len(decrypted)} records")
+            logger.info("Data contains %d records", len(decrypted))
         elif isinstance(decrypted, dict):
-            logger.info(f"Data is a dict with keys: {list(decrypted.keys())}")
+            logger.info("Data is a dict with keys: %s", list(decrypted.keys()))
             # Log data point counts
             for key, value in decrypted.items():
                 if isinstance(value, dict) and 'data' in value:
                     data_points = len(value.get('data', {}))
-                    logger.info(f"  {key}: {data_points} data points")
+                    logger.info("  %s: %d data points", key, data_points)
 
         # Save metadata
+        now = datetime.now().isoformat()
         new_metadata = {
-            'last_fetch_time': datetime.now(),
-            'last_check_time': datetime.now(),
+            'last_fetch_time': now,
+            'last_check_time': now,
             'data_hash': data_hash,
+            'etag': etag,
+            'last_modified': last_modified,
             'file_size_bytes': len(encrypted_data),
             'source_url': DATA_SOURCE_URL,
             'cache_max_age_hours': CACHE_MAX_AGE_HOURS
@@ -338,18 +349,45 @@ def fetch_and_decrypt_energy_data(force_refresh=False):
         return True
 
     except Exception as e:
-        logger.error(f"Error in fetch_and_decrypt_energy_data: {e}", exc_info=True)
-
-        # If we have cached data, use it as fallback
-        output_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
-        if os.path.exists(output_path):
-            age_hours = get_file_age_hours(output_path)
-            logger.warning(f"Using cached data as fallback (age: {age_hours:.1f}h)")
+        logger.error("Error in update_cached_data: %s", e, exc_info=True)
+
+        # If we have cached data, use it as fallback. A forced refresh only
+        # accepts a copy that is still within CACHE_MAX_AGE_HOURS, so a failed
+        # fetch or HMAC check does not ship arbitrarily old data.
+        output_path = os.path.join(cache_dir, OUTPUT_FILE)
+        age_hours = get_file_age_hours(output_path)
+        if age_hours is not None:
+            if force_refresh and age_hours > CACHE_MAX_AGE_HOURS:
+                logger.error("Cached data is %.1f hours old (max: %sh), not using it as fallback", age_hours, CACHE_MAX_AGE_HOURS)
+                return False
+            logger.warning("Using cached data as fallback (age: %.1fh)", age_hours)
             return True
 
         return False
 
 
+def fetch_and_decrypt_energy_data(force_refresh=False):
+    """
+    Fetch and decrypt energy price forecast data with intelligent caching.
+
+    The data is maintained in the cache directory (see get_cache_dir) and,
+    when that is not OUTPUT_DIR, copied there afterwards for publishing.
+
+    Args:
+        force_refresh (bool): Force refresh even if cache is valid
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    cache_dir = get_cache_dir()
+    if not update_cached_data(cache_dir, force_refresh=force_refresh):
+        return False
+
+    if cache_dir != OUTPUT_DIR:
+        return publish_cached_data(cache_dir)
+    return True
+
+
 def main():
     """Main function."""
     logger.info("=" * 70)
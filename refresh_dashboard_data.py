@@ -6,12 +6,41 @@ and fetching/decrypting the latest data.
 
 import os
 import sys
-import configparser
+import traceback
 from pathlib import Path
 
 # Path to energyDataHub secrets.ini
 SECRETS_PATH = r"C:\Users\scbry\HAN\HAN H2 LAB IPKW - Projects - WebBasedControl\01. Software\energyDataHub\secrets.ini"
 
+def read_security_keys(path):
+    """
+    Read the key = value pairs of the [security_keys] section of an INI file.
+
+    Only two values are needed, so this scans the lines directly instead of
+    building a full ConfigParser. Only `key = value` lines are understood
+    (no `key: value` lines or multi-line values); key names are lowercased
+    like ConfigParser does.
+
+    Args:
+        path (str): Path to secrets.ini
+
+    Returns:
+        dict: Keys and values found in the [security_keys] section
+    """
+    keys = {}
+    in_section = False
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        if line.startswith('['):
+            in_section = line == '[security_keys]'
+        elif in_section and '=' in line:
+            # Split on the first '=' only; base64 values end in '=' padding
+            name, value = line.split('=', 1)
+            keys[name.strip().lower()] = value.strip()
+    return keys
+
 def main():
     print("=" * 60)
     print("Energy Dashboard Data Refresh")
@@ -30,11 +59,10 @@ def main():
 
     # Read secrets.ini
     try:
-        config = configparser.ConfigParser()
-        config.read(SECRETS_PATH)
+        keys = read_security_keys(SECRETS_PATH)
 
-        encryption_key = config.get('security_keys', 'encryption')
-        hmac_key = config.get('security_keys', 'hmac')
+        encryption_key = keys.get('encryption')
+        hmac_key = keys.get('hmac')
 
         if not encryption_key or not hmac_key:
             print("ERROR: Could not read encryption keys from secrets.ini")
@@ -81,7 +109,6 @@ def main():
     except Exception as e:
         print()
         print(f"ERROR: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -1,10 +1,18 @@
 import os
-import re
 import json
+import binascii
 import logging
+import orjson
 from math import cos, asin, sqrt
 from configparser import ConfigParser
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the decorated functions stay plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
 
 def ensure_output_directory(path: str) -> None:
     """Ensure the output directory exists."""
@@ -88,6 +96,7 @@ def load_config(script_dir: str, filename: str = 'secrets.ini') -> ConfigParser:
         f"2. Create a {filename} file in {script_dir}"
     )
 
+@njit(cache=True, fastmath=True)
 def distance(lat1, lon1, lat2, lon2):
     p = 0.017453292519943295
     a = (
@@ -99,12 +108,68 @@ def distance(lat1, lon1, lat2, lon2):
     return distance
 
 def closest(data, v):
-    return min(
-        data,
-        key=lambda p: distance(
-            v["latitude"], v["longitude"], p["latitude"], p["longitude"]
-        ),
+    try:
+        import numpy as np
+    except ImportError:
+        # numpy is optional; without it fall back to a plain scan
+        return min(
+            data,
+            key=lambda p: distance(
+                v["latitude"], v["longitude"], p["latitude"], p["longitude"]
+            ),
+        )
+
+    # Vectorized haversine over all candidates; arcsin/sqrt are monotonic, so
+    # the smallest haversine term marks the closest point. data may be any
+    # iterable, so materialize it once for indexing.
+    data = list(data)
+    p = 0.017453292519943295
+    lats = np.array([point["latitude"] for point in data], dtype=float)
+    lons = np.array([point["longitude"] for point in data], dtype=float)
+    lat, lon = v["latitude"], v["longitude"]
+    a = (
+        0.5
+        - np.cos((lats - lat) * p) / 2
+        + np.cos(lat * p) * np.cos(lats * p) * (1 - np.cos((lons - lon) * p)) / 2
     )
+    return data[int(np.argmin(a))]
+
+def parse_file_content(content: str) -> Tuple[str, Any]:
+    """
+    Detect whether file content is JSON or encrypted Base64, parsing JSON
+    in the same pass so it never has to be parsed twice. JSON is parsed with
+    orjson, falling back to json for documents orjson rejects (NaN/Infinity).
+
+    Args:
+        content (str): The file content to analyze
+
+    Returns:
+        tuple: ('json', parsed data) or ('encrypted', the stripped content)
+
+    Raises:
+        ValueError: If the content is neither valid JSON nor base64 encoded
+    """
+    stripped = content.strip()
+
+    try:
+        return 'json', orjson.loads(stripped)
+    except orjson.JSONDecodeError:
+        # orjson rejects NaN/Infinity, which json.dump writes by default
+        if stripped[:1] in ('{', '['):
+            try:
+                return 'json', json.loads(stripped)
+            except json.JSONDecodeError:
+                pass
+
+    # Probe a short prefix; strict mode fails fast on any non-base64 character
+    try:
+        if stripped:
+            binascii.a2b_base64(stripped[:64].encode(), strict_mode=True)
+            return 'encrypted', stripped
+    except (binascii.Error, UnicodeEncodeError):
+        pass
+
+    raise ValueError("File content is neither valid JSON nor base64 encoded")
 
 def detect_file_type(content: str) -> str:
     """
@@ -116,17 +181,7 @@ def detect_file_type(content: str) -> str:
     Returns:
         str: 'json' or 'encrypted'
     """
-    # Try to detect if it's base64 encoded
-    base64_pattern = r'^[A-Za-z0-9+/=]+$'
-    if re.match(base64_pattern, content.strip()):
-        return 'encrypted'
-    
-    # Try to detect if it's JSON
-    try:
-        json.loads(content)
-        return 'json'
-    except json.JSONDecodeError:
-        raise ValueError("File content is neither valid JSON nor base64 encoded")
+    return parse_file_content(content)[0]
     
 def save_data_file(
     data: Dict[str, Any],
@@ -170,17 +225,24 @@ def load_data_file(file_path: str, handler: Any = None) -> Dict[str, Any]:
         dict: The loaded data
     """
     try:
-        with open(file_path, 'r') as f:
-            content = f.read().strip()
-        
-        file_type = detect_file_type(content)
+        with open(file_path, 'rb') as f:
+            content = f.read()
+
+        # Plain JSON (the common case) goes straight to orjson as bytes
+        if content[:1] in (b'{', b'['):
+            try:
+                return orjson.loads(content)
+            except orjson.JSONDecodeError:
+                pass  # e.g. NaN/Infinity; parse_file_content falls back to json
+
+        file_type, parsed = parse_file_content(content.decode('utf-8'))
         
         if file_type == 'encrypted':
             if handler is None:
                 raise ValueError("Encrypted file found but no handler provided")
-            return handler.decrypt_and_verify(content)
+            return handler.decrypt_and_verify(parsed)
         else:
-            return json.loads(content)
+            return parsed
             
     except Exception as e:
         logging.error(f"Error loading file {file_path}: {e}")
@@ -1,14 +1,24 @@
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import hashes, hmac
 from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.backends.openssl.backend import backend as openssl_backend
+from cryptography.exceptions import InvalidSignature
 import os
 import json
+import hmac
 import base64
 
+# AES-CBC and HMAC-SHA256 both run inside OpenSSL, which selects AES-NI/SHA-NI
+# at runtime; expose the linked version so build logs show which library is in use.
+OPENSSL_VERSION = openssl_backend.openssl_version_text()
+
 class SecureDataHandler:
     def __init__(self, encryption_key, hmac_key):
         self.encryption_key = encryption_key
         self.hmac_key = hmac_key
+        # Reuse one AES key object (it only holds the key and checks its
+        # length). cryptography exposes no way to cache the expanded key
+        # schedule, so OpenSSL still expands it for every Cipher context.
+        self._aes = algorithms.AES(encryption_key)
 
     def encrypt_and_sign(self, data) -> str:
         # Serialize data to JSON
@@ -18,42 +28,43 @@ class SecureDataHandler:
         iv = os.urandom(16)
 
         # Encrypt the data
-        cipher = Cipher(algorithms.AES(self.encryption_key), modes.CBC(iv), backend=default_backend())
+        cipher = Cipher(self._aes, modes.CBC(iv), backend=default_backend())
         encryptor = cipher.encryptor()
         padded_data = self._pad(json_data)
         ciphertext = encryptor.update(padded_data) + encryptor.finalize()
 
-        # Compute HMAC
-        h = hmac.HMAC(self.hmac_key, hashes.SHA256(), backend=default_backend())
-        h.update(iv + ciphertext)
-        signature = h.finalize()
+        # Compute HMAC (one-shot OpenSSL call)
+        signature = hmac.digest(self.hmac_key, iv + ciphertext, 'sha256')
 
         # Combine IV, ciphertext, and signature
         result = iv + ciphertext + signature
         return base64.b64encode(result).decode('utf-8')
 
     def decrypt_and_verify(self, encrypted_data) -> dict:
-        # Decode from base64
-        data = base64.b64decode(encrypted_data.encode('utf-8'))
-
-        # Extract IV, ciphertext, and signature
-        iv = data[:16]
-        ciphertext = data[16:-32]
-        signature = data[-32:]
-
-        # Verify HMAC
-        h = hmac.HMAC(self.hmac_key, hashes.SHA256(), backend=default_backend())
-        h.update(iv + ciphertext)
-        h.verify(signature)
+        # Decode from base64 (accepts str or ASCII bytes)
+        raw = base64.b64decode(encrypted_data)
+
+        # Slice IV, ciphertext, and signature as views into the decoded
+        # buffer; IV + ciphertext is contiguous, so it is signed as one slice
+        view = memoryview(raw)
+        signed = view[:-32]
+        iv = bytes(view[:16])
+        ciphertext = view[16:-32]
+        signature = view[-32:]
+
+        # Verify HMAC (one-shot OpenSSL call, constant-time comparison)
+        expected = hmac.digest(self.hmac_key, signed, 'sha256')
+        if not hmac.compare_digest(expected, signature):
+            raise InvalidSignature("Signature did not match digest.")
 
         # Decrypt the data
-        cipher = Cipher(algorithms.AES(self.encryption_key), modes.CBC(iv), backend=default_backend())
+        cipher = Cipher(self._aes, modes.CBC(iv), backend=default_backend())
         decryptor = cipher.decryptor()
         padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
         plaintext = self._unpad(padded_plaintext)
 
-        # Parse JSON
-        data = json.loads(plaintext.decode('utf-8'))
+        # Parse JSON (json.loads detects the UTF-8 encoding of bytes itself)
+        data = json.loads(plaintext)
 
         return data
 
@@ -1,38 +1,50 @@
-from datetime import datetime, tzinfo
+from datetime import datetime
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
+# Heavy optional dependencies are imported on first use and then reused
+
+@lru_cache(maxsize=1)
+def _tf():
+    # Shared TimezoneFinder (loading its polygon data is slow)
+    from timezonefinder import TimezoneFinder
+    return TimezoneFinder(in_memory=True)
+
+@lru_cache(maxsize=1)
+def _rg():
+    import reverse_geocoder
+    return reverse_geocoder
+
 # Ensure start and end times are in the specified timezone
 def ensure_timezone(start_time: datetime, end_time: datetime) -> tuple[datetime, datetime, ZoneInfo]:
-    import pytz
     tz = start_time.tzinfo
 
-    if not isinstance(tz, pytz.BaseTzInfo):
-        # If it's not a pytz timezone, try to create one
+    if not isinstance(tz, ZoneInfo):
+        # Other tzinfo implementations (pytz, datetime.timezone.utc) stringify to their zone name
         try:
-            tz = pytz.timezone(str(tz))
-        except:
-            raise ValueError("Could not create a pytz timezone object")
+            tz = ZoneInfo(str(tz))
+        except Exception:
+            raise ValueError("Could not create a ZoneInfo timezone object")
     start_time = start_time.astimezone(tz)
     end_time = end_time.astimezone(tz)
     return start_time, end_time, tz
 
+# Timezone names cached per 0.01 degree grid cell (integer coordinates in hundredths)
+@lru_cache(maxsize=4096)
+def _tz_cached(lat_q:int, lon_q:int) -> str | None:
+    return _tf().timezone_at(lat=lat_q / 100, lng=lon_q / 100)
+
 def get_timezone(lat:float, lon:float) -> ZoneInfo:
-    from timezonefinder import TimezoneFinder
-    tf = TimezoneFinder()
-    timezone_str = tf.timezone_at(lat=float(lat), lng=float(lon))
+    timezone_str = _tz_cached(round(float(lat) * 100), round(float(lon) * 100))
     if timezone_str is None:
         return None
     return ZoneInfo(timezone_str)
 
 def get_timezone_and_country(lat, lng):
-    from timezonefinder import TimezoneFinder
-    import reverse_geocoder as rg
-
-    tf = TimezoneFinder()
-    timezone_str = tf.timezone_at(lat=lat, lng=lng)
+    timezone_str = _tf().timezone_at(lat=lat, lng=lng)
 
     # Get country code
-    result = rg.search((lat, lng), mode=1)  # mode=1 returns only one result
+    result = _rg().search((lat, lng), mode=1)  # mode=1 returns only one result
     country_code = result[0]['cc']
 
     if timezone_str is None:
@@ -40,7 +52,6 @@ def get_timezone_and_country(lat, lng):
     return ZoneInfo(timezone_str), country_code
 
 def compare_timezones(current_time: datetime, lat: float, lon: float) -> tuple[bool, str]:
-    import pytz
     coord_tz = get_timezone(lat, lon)
     if coord_tz is None:
         return False, "Could not determine timezone from coordinates"
@@ -51,12 +62,11 @@ def compare_timezones(current_time: datetime, lat: float, lon: float) -> tuple[b
         return False, "Current time is naive (no timezone info)"
 
     # Convert both to ZoneInfo objects for comparison
-    if isinstance(time_tz, pytz.tzinfo.BaseTzInfo):
-        time_tz = ZoneInfo(time_tz.zone)
-    elif isinstance(time_tz, tzinfo):
-        # If it's a tzinfo object but not a pytz timezone, try to get its name
+    if not isinstance(time_tz, ZoneInfo):
+        # pytz zones carry their IANA name in .zone; for other tzinfo objects
+        # try the name returned by tzname()
         try:
-            time_tz = ZoneInfo(time_tz.tzname(None))
+            time_tz = ZoneInfo(getattr(time_tz, 'zone', None) or time_tz.tzname(None))
         except Exception:
             # If we can't get a name, we'll compare using the original object
             pass